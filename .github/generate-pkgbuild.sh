@@ -23,7 +23,9 @@ depends=(
 'python-rich'
   'python-certifi'
   'python-typing_extensions'
+  'python-urllib3'
 )
+optdepends=('python-orjson: 加速 JSON 解析')
 makedepends=('python-build' 'python-installer' 'python-hatchling')
 source=("\$pkgname-\$pkgver.tar.gz::$URL")
 sha256sums=('$SHA256')
@@ -1,10 +1,10 @@
-import json
 import logging
+import mmap
+import os
 import re
 import shutil
 import subprocess
 import threading
-import webbrowser
 from enum import Enum
 from importlib import metadata
 from pathlib import Path
@@ -14,15 +14,19 @@ from urllib.request import Request, urlopen
 import typer
 from typing_extensions import Annotated
 
-from ww_manager.config import APPID_TO_SERVER, load_app_config, save_app_config
-from ww_manager.core import WGameManager, WWError
+from ww_manager.config import appid_to_server, json_loads, load_app_config, save_app_config
 
 __version__ = metadata.version("ww-manager")
 
+# 抽卡链接以 aki-gm-resources 域名开头，直接锚定在字面量上，避免长行上的回溯
+_GACHA_URL_MARK = b"aki-gm-resources"
+_GACHA_URL_RE = re.compile(rb'https?://aki-gm-resources[^\s"]*')
+_VERSION_NUM_RE = re.compile(r"\d+")
+
 
 def parse_version(version_str: str) -> tuple:
     """版本号"""
-    return tuple(map(int, re.findall(r"\d+", str(version_str))))
+    return tuple(map(int, _VERSION_NUM_RE.findall(str(version_str))))
 
 
 def check_pypi_version_silent():
@@ -31,13 +35,14 @@ def check_pypi_version_silent():
         url = "https://pypi.org/pypi/ww-manager/json"
         req = Request(url, headers={"User-Agent": "WW-Manager-Update-Checker"})
         with urlopen(req, timeout=3) as response:
-            data = json.loads(response.read().decode())
+            data = json_loads(response.read())
             latest_version = data["info"]["version"]
 
             latest_v = parse_version(latest_version)
             current_v = parse_version(__version__)
 
-            config = load_app_config()
+            # 在副本上修改，避免与主线程共享的缓存配置互相干扰
+            config = dict(load_app_config())
             if latest_v > current_v:
                 config["latest_available_version"] = latest_version
                 save_app_config(config)
@@ -49,6 +54,30 @@ def check_pypi_version_silent():
         pass
 
 
+def _find_last_gacha_url(log_file: Path) -> Optional[bytes]:
+    """映射日志文件并从末尾查找最近一次出现的抽卡链接"""
+    with open(log_file, "rb") as f:
+        # 空文件无法被 mmap
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            while True:
+                pos = mm.rfind(_GACHA_URL_MARK, 0, end)
+                if pos == -1:
+                    return None
+                # 只对命中所在的那一行跑正则
+                line_start = mm.rfind(b"\n", 0, pos) + 1
+                line_end = mm.find(b"\n", pos)
+                if line_end == -1:
+                    line_end = len(mm)
+                matches = _GACHA_URL_RE.findall(mm[line_start:line_end])
+                if matches:
+                    return matches[-1]
+                # 该行只出现了域名而没有完整链接，继续向前查找
+                end = line_start
+
+
 def get_help_text_with_version():
     """生成帮助文本"""
     help_text = f"WutheringWaves CLI Manager (v{__version__})"
@@ -87,8 +116,9 @@ def version_callback(value: bool):
         raise typer.Exit()
 
 
-def setup_logging(verbose: bool):
-    level = logging.DEBUG if verbose else logging.INFO
+def ensure_logging(ctx: typer.Context):
+    """在首次需要输出日志时才初始化日志，重复调用不会重复安装 handler"""
+    level = logging.DEBUG if ctx.obj.get("verbose") else logging.INFO
     logging.basicConfig(
         level=level,
         format="%(asctime)s [%(levelname)s] %(message)s",
@@ -97,6 +127,11 @@ def setup_logging(verbose: bool):
     )
 
 
+def _canon(p) -> str:
+    """仅做字符串层面的路径规范化，不访问文件系统"""
+    return os.path.normcase(os.path.normpath(os.fspath(p)))
+
+
 def get_game_path(ctx: typer.Context) -> Path:
     p = ctx.obj.get("game_path")
     if not p:
@@ -109,6 +144,15 @@ def get_game_path(ctx: typer.Context) -> Path:
     return p
 
 
+def detect_server(path: Path) -> str:
+    """根据本地配置判断服务器类型，无法判断时默认为官服"""
+    try:
+        d = json_loads((path / "launcherDownloadConfig.json").read_bytes())
+    except (OSError, ValueError):
+        return "cn"
+    return appid_to_server().get(d.get("appId"), "cn")
+
+
 # --- Commands ---
 
 
@@ -124,9 +168,14 @@ def main(
     """
     鸣潮 (Wuthering Waves) CLI 管理器
     """
-    setup_logging(verbose)
-    config = load_app_config()
+    ctx.ensure_object(dict)
+    ctx.obj["verbose"] = verbose
     _ = version
+    # update 既不需要游戏路径，也会自行检查新版本，无需读写配置或启动检测线程
+    if ctx.invoked_subcommand == "update":
+        return
+
+    config = load_app_config()
     last_check_version = config.get("latest_available_version")
 
     try:
@@ -140,12 +189,17 @@ def main(
     default_path = config.get("default_path")
     final_path = path if path else (Path(default_path) if default_path else None)
 
-    if path and str(path.resolve()) != default_path:
-        config["default_path"] = str(path.resolve())
-        save_app_config(config)
-        logger.info(f"默认路径已更新为: {path.resolve()}")
+    # 传入的绝对路径与已保存的一致时，跳过 resolve() 带来的逐级 stat
+    if path and not (default_path and path.is_absolute() and _canon(path) == _canon(default_path)):
+        resolved = path.resolve()
+        resolved_str = str(resolved)
+        final_path = resolved
+        if resolved_str != default_path:
+            config["default_path"] = resolved_str
+            save_app_config(config)
+            ensure_logging(ctx)
+            logger.info(f"默认路径已更新为: {resolved}")
 
-    ctx.ensure_object(dict)
     ctx.obj["game_path"] = final_path
 
 
@@ -210,33 +264,29 @@ def update():
 def status(ctx: typer.Context):
     """查看当前客户端状态"""
     path = get_game_path(ctx)
-    cfg_file = path / "launcherDownloadConfig.json"
-    if not cfg_file.exists():
+    try:
+        data = json_loads((path / "launcherDownloadConfig.json").read_bytes())
+    except FileNotFoundError:
         typer.echo("未找到配置文件，无法确定版本。")
         return
-    try:
-        data = json.loads(cfg_file.read_text(encoding="utf-8"))
-        app_id = data.get("appId")
-        server = APPID_TO_SERVER.get(app_id, "未知")
-        typer.secho(f"目录: {path}", fg="green")
-        typer.echo(f"服务器: {server}")
-        typer.echo(f"版本: {data.get('version')}")
-    except Exception as e:
+    except (OSError, ValueError) as e:
+        ensure_logging(ctx)
         logger.error(f"读取状态失败: {e}")
+        return
+    server = appid_to_server().get(data.get("appId"), "未知")
+    typer.secho(f"目录: {path}", fg="green")
+    typer.echo(f"服务器: {server}")
+    typer.echo(f"版本: {data.get('version')}")
 
 
 @app.command()
 def sync(ctx: typer.Context):
     """全量校验并修复文件"""
+    from ww_manager.core import WGameManager, WWError
+
+    ensure_logging(ctx)
     path = get_game_path(ctx)
-    cfg_file = path / "launcherDownloadConfig.json"
-    server = "cn"
-    if cfg_file.exists():
-        try:
-            d = json.loads(cfg_file.read_text(encoding="utf-8"))
-            server = APPID_TO_SERVER.get(d.get("appId"), "cn")
-        except Exception:
-            pass
+    server = detect_server(path)
     try:
         mgr = WGameManager(path, server)
         mgr.sync_files(force_check_md5=True)
@@ -248,6 +298,9 @@ def sync(ctx: typer.Context):
 @app.command()
 def download(ctx: typer.Context, server: ServerType):
     """[初始化] 下载完整客户端"""
+    from ww_manager.core import WGameManager, WWError
+
+    ensure_logging(ctx)
     path = get_game_path(ctx)
     try:
         mgr = WGameManager(path, server.value)
@@ -264,6 +317,9 @@ def checkout(
     force_sync: Annotated[bool, typer.Option("--force-sync", help="切换后强制同步")] = False,
 ):
     """切换服务器"""
+    from ww_manager.core import WGameManager, WWError
+
+    ensure_logging(ctx)
     path = get_game_path(ctx)
     try:
         mgr = WGameManager(path, server.value)
@@ -280,15 +336,11 @@ def predownload(
     apply_flag: Annotated[bool, typer.Option("--apply", help="应用预下载资源")] = False,
 ):
     """预下载管理"""
+    from ww_manager.core import WGameManager, WWError
+
+    ensure_logging(ctx)
     path = get_game_path(ctx)
-    cfg_file = path / "launcherDownloadConfig.json"
-    server = "cn"
-    if cfg_file.exists():
-        try:
-            d = json.loads(cfg_file.read_text(encoding="utf-8"))
-            server = APPID_TO_SERVER.get(d.get("appId"), "cn")
-        except Exception:
-            pass
+    server = detect_server(path)
     is_apply = (action == "apply") or apply_flag
     if action and action != "apply":
         typer.secho(f"未知的参数: {action}。直接运行进行预下载，应用更新请使用 'apply'。", fg="red")
@@ -313,28 +365,25 @@ def log(
     open_browser: Annotated[bool, typer.Option("--open", "-o", help="使用默认浏览器打开链接")] = False,
 ):
     """获取抽卡分析链接"""
+    import webbrowser
+
     path = get_game_path(ctx)
     log_file = path / "Client/Saved/Logs/Client.log"
-    if not log_file.exists():
+    try:
+        found = _find_last_gacha_url(log_file)
+    except FileNotFoundError:
         typer.secho("未找到日志文件", fg="red")
         return
-    pattern = re.compile(r'https?://[^"]+')
-    found: str | None = None
-    try:
-        with open(log_file, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                if "aki-gm-resources.aki-game.com" in line:
-                    m = pattern.search(line)
-                    if m:
-                        found = m.group(0)
     except Exception as e:
+        ensure_logging(ctx)
         logger.error(e)
         typer.secho("读取日志时出现错误", fg="red")
         return
     if found:
-        typer.secho(found, fg="green")
+        url = found.decode("utf-8", errors="ignore")
+        typer.secho(url, fg="green")
         if open_browser:
-            webbrowser.open(found)
+            webbrowser.open(url)
     else:
         typer.echo("未找到链接，请先在游戏中打开抽卡记录以更新日志文件。")
 
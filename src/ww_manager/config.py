@@ -1,10 +1,17 @@
 # config.py
+import functools
 import json
 import logging
 import os
 import platform
 from pathlib import Path
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时回退到标准库 json
+    orjson = None
 
 
 # --- 常量定义 ---
@@ -24,46 +31,82 @@ def get_config_dir() -> Path:
 CONFIG_DIR = get_config_dir()
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
-SERVER_CONFIGS = {
-    "cn": {
-        "api_url": "https://prod-cn-alicdn-gamestarter.kurogame.com/launcher/game/G152/10003_Y8xXrXk65DqFHEDgApn3cpK5lfczpFx5/index.json",
-        "appId": "10003",
-    },
-    "global": {
-        "api_url": "https://prod-alicdn-gamestarter.kurogame.com/launcher/game/G153/50004_obOHXFrFanqsaIEOmuKroCcbZkQRBC7c/index.json",
-        "appId": "50004",
-    },
-    "bilibili": {
-        "api_url": "https://prod-cn-alicdn-gamestarter.kurogame.com/launcher/game/G152/10004_j5GWFuUFlb8N31Wi2uS3ZAVHcb7ZGN7y/index.json",
-        "appId": "10004",
-    },
-}
-
-APPID_TO_SERVER = {v["appId"]: k for k, v in SERVER_CONFIGS.items()}
-
-SERVER_DIFF_FILES = {
-    "cn": [
-        "Client/Binaries/Win64/kuro_login.dll",
-        "Client/Content/Paks/pakchunk1-Kuro-Win64-Shipping.pak",
-    ],
-    "bilibili": [
-        "Client/Binaries/Win64/bilibili_sdk.dll",
-        "Client/Content/Paks/pakchunk1-Bilibili-Win64-Shipping.pak",
-    ],
-    "global": [
-        "Client/Binaries/Win64/kuro_login.dll",
-        "Client/Content/Paks/pakchunk1-Kuro-Win64-Shipping.pak",
-    ],
-}
+
+class ServerCfg(NamedTuple):
+    api_url: str
+    app_id: str
+
+
+SERVER_CONFIGS = MappingProxyType(
+    {
+        "cn": ServerCfg(
+            api_url="https://prod-cn-alicdn-gamestarter.kurogame.com/launcher/game/G152/10003_Y8xXrXk65DqFHEDgApn3cpK5lfczpFx5/index.json",
+            app_id="10003",
+        ),
+        "global": ServerCfg(
+            api_url="https://prod-alicdn-gamestarter.kurogame.com/launcher/game/G153/50004_obOHXFrFanqsaIEOmuKroCcbZkQRBC7c/index.json",
+            app_id="50004",
+        ),
+        "bilibili": ServerCfg(
+            api_url="https://prod-cn-alicdn-gamestarter.kurogame.com/launcher/game/G152/10004_j5GWFuUFlb8N31Wi2uS3ZAVHcb7ZGN7y/index.json",
+            app_id="10004",
+        ),
+    }
+)
+
+
+@functools.lru_cache(maxsize=1)
+def appid_to_server() -> Mapping[str, str]:
+    """appId -> 服务器名 的反查表，首次使用时构建"""
+    return MappingProxyType({c.app_id: k for k, c in SERVER_CONFIGS.items()})
+
+
+SERVER_DIFF_FILES = MappingProxyType(
+    {
+        "cn": frozenset(
+            {
+                "Client/Binaries/Win64/kuro_login.dll",
+                "Client/Content/Paks/pakchunk1-Kuro-Win64-Shipping.pak",
+            }
+        ),
+        "bilibili": frozenset(
+            {
+                "Client/Binaries/Win64/bilibili_sdk.dll",
+                "Client/Content/Paks/pakchunk1-Bilibili-Win64-Shipping.pak",
+            }
+        ),
+        "global": frozenset(
+            {
+                "Client/Binaries/Win64/kuro_login.dll",
+                "Client/Content/Paks/pakchunk1-Kuro-Win64-Shipping.pak",
+            }
+        ),
+    }
+)
+
+
+# --- JSON 编解码 ---
+def json_loads(data: bytes) -> Any:
+    """解析 JSON，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON 字节串，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
 
 
 # --- 配置管理 ---
+@functools.lru_cache(maxsize=1)
 def load_app_config() -> Dict[str, Any]:
-    if not CONFIG_FILE.exists():
-        return {}
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return json_loads(CONFIG_FILE.read_bytes())
+    except FileNotFoundError:
+        return {}
     except Exception as e:
         logging.getLogger("WW_Manager").warning(f"无法加载配置文件 {CONFIG_FILE}: {e}")
         return {}
@@ -72,7 +115,9 @@ def load_app_config() -> Dict[str, Any]:
 def save_app_config(config: Dict[str, Any]) -> None:
     try:
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
+        with open(CONFIG_FILE, "wb") as f:
+            f.write(json_dumps(config, indent=True))
     except Exception as e:
         logging.getLogger("WW_Manager").error(f"无法保存配置 {CONFIG_FILE}: {e}")
+    finally:
+        load_app_config.cache_clear()
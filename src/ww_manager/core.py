@@ -1,18 +1,25 @@
 # core.py
+import errno
 import gzip
 import hashlib
+import importlib.util
+import io
 import json
 import logging
+import mmap
 import os
+import re
 import shutil
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict, List, Optional
-from urllib.parse import quote, urljoin
-from urllib.request import Request, urlopen
+from urllib.parse import quote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
 
+import urllib3
 from rich.progress import (
     BarColumn,
     DownloadColumn,
@@ -24,10 +31,16 @@ from rich.progress import (
     TransferSpeedColumn,
 )
 
-from ww_manager.config import SERVER_CONFIGS, SERVER_DIFF_FILES
+from ww_manager.config import SERVER_CONFIGS, SERVER_DIFF_FILES, json_dumps, json_loads
 
 logger = logging.getLogger("WW_Manager")
 
+# 下载过程中的临时文件及其续传信息
+_PARTIAL_SUFFIXES = (".temp", ".temp.meta", ".part", ".part.meta")
+
+# quote(..., safe=":/") 不会改动的字符，绝大多数资源路径都只包含这些字符
+_URL_SAFE_RE = re.compile(r"[A-Za-z0-9_.~:/-]*")
+
 
 # --- 自定义异常 ---
 class WWError(Exception):
@@ -50,77 +63,213 @@ class ConfigError(WWError):
 
 # --- MD5 缓存管理器 ---
 class MD5Cache:
+    """MD5 缓存以 JSONL 追加日志保存：每行一个 {rel: entry}，entry 为 null 表示删除，后出现的行覆盖先出现的"""
+
     def __init__(self, cache_path: Path, game_root: Path):
         self.cache_path = cache_path
         self.game_root = game_root
-        self.cache: Dict[str, Dict[str, Any]] = self._load()
-        self._updated = False
+        self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+        # 自上次保存以来改动过的条目，save 时只追加这些
+        self._dirty: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._log_lines = 0
+        self._needs_compact = False
         self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+    @property
+    def cache(self) -> Dict[str, Dict[str, Any]]:
+        # 首次用到时才解析缓存文件，预下载等不涉及校验的命令无需付出这部分开销
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = self._load()
+        return self._cache
+
+    def _legacy_path(self) -> Path:
+        return self.cache_path.with_suffix(".json")
 
     def _load(self) -> Dict[str, Any]:
-        if self.cache_path.exists():
+        cache: Dict[str, Any] = {}
+        try:
+            with open(self.cache_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # 进程在追加时被杀会留下没有换行的末行 (即使内容本身完整)，
+                        # 下次保存时整体重写，以免新行接在残行后面
+                        self._needs_compact = True
+                    try:
+                        record = json_loads(line)
+                    except ValueError:
+                        # 写了一半的末行无法解析，直接跳过
+                        continue
+                    if not isinstance(record, dict):
+                        continue
+                    for rel_path, entry in record.items():
+                        if entry is None:
+                            cache.pop(rel_path, None)
+                        else:
+                            cache[rel_path] = entry
+                    self._log_lines += 1
+            return cache
+        except FileNotFoundError:
+            pass
+        except Exception:
+            return {}
+        # 旧版本的整份 JSON 缓存，读入后在下次保存时整体改写为日志格式
+        legacy = self._legacy_path()
+        if legacy.exists():
             try:
-                with open(self.cache_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                cache = json_loads(legacy.read_bytes())
+                self._needs_compact = True
             except Exception:
                 return {}
-        return {}
+        return cache
+
+    def _mark(self, rel_path: str, entry: Optional[Dict[str, Any]]) -> None:
+        # 与 save 中交换 _dirty 互斥，避免标记写进已被取走的旧字典而丢失；
+        # 只在缓存未命中 (已经算过一遍文件) 时才会走到这里，加锁开销可以忽略
+        with self._lock:
+            self._dirty[rel_path] = entry
 
     def save(self) -> None:
-        if not self._updated:
+        if not self._dirty and not self._needs_compact:
             return
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
         try:
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(self.cache, f, indent=2)
+            if self._needs_compact or self._log_lines + len(dirty) > 2 * len(self.cache):
+                self._compact()
+            else:
+                # 只追加改动过的条目，保存开销与改动量成正比而不是与缓存大小成正比
+                with open(self.cache_path, "ab") as f:
+                    f.write(b"".join(json_dumps({k: v}) + b"\n" for k, v in dirty.items()))
+                self._log_lines += len(dirty)
             logger.debug("MD5 缓存已保存")
         except Exception as e:
+            with self._lock:
+                # 保存失败时放回，保存期间新标记的条目更新，优先保留
+                for k, v in dirty.items():
+                    self._dirty.setdefault(k, v)
             logger.error(f"保存 MD5 缓存失败: {e}")
+        self._last_save = time.monotonic()
+
+    def _compact(self) -> None:
+        """日志中的过期行过多时整体重写，先写临时文件再原子替换，进程中途被杀也不会留下写了一半的缓存"""
+        snapshot = dict(self.cache)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        tmp_path.write_bytes(b"".join(json_dumps({k: v}) + b"\n" for k, v in snapshot.items()))
+        os.replace(tmp_path, self.cache_path)
+        self._log_lines = len(snapshot)
+        if self._needs_compact:
+            self._needs_compact = False
+            self._legacy_path().unlink(missing_ok=True)
+
+    def checkpoint(self, interval: float = 30.0) -> None:
+        """距离上次保存超过 interval 秒时落盘，长时间校验被中断也只丢失最近的结果"""
+        if time.monotonic() - self._last_save >= interval:
+            self.save()
+
+    def get(self, file_path: Path, st: Optional[os.stat_result] = None) -> Optional[str]:
+        return self.get_by_rel(self._rel(file_path) or file_path.name, file_path, st)
+
+    def get_by_rel(self, rel_path: str, file_path: Path, st: Optional[os.stat_result] = None) -> Optional[str]:
+        """rel_path 即清单中的 dest，可直接作为缓存键；st 为调用方已取得的 stat 结果，传入时不再重复 stat"""
+        if st is None:
+            try:
+                st = file_path.stat()
+            except OSError:
+                return None
 
-    def get(self, file_path: Path) -> Optional[str]:
-        if not file_path.exists():
-            return None
-
-        try:
-            rel_path = str(file_path.relative_to(self.game_root)).replace("\\", "/")
-        except ValueError:
-            rel_path = file_path.name
-
-        mtime = os.path.getmtime(file_path)
-
-        with self._lock:
-            if rel_path in self.cache:
-                data = self.cache[rel_path]
-                if data["mtime"] == mtime:
-                    return data["md5"]
+        # 单次 dict 读写在 GIL 下是原子的，无需加锁；
+        # 两个线程同时计算同一文件时写入的也是相同的值
+        data = self.cache.get(rel_path)
+        # 旧版本的缓存条目没有 size 字段，此时只比较 mtime
+        if data and data["mtime"] == st.st_mtime and data.get("size", st.st_size) == st.st_size:
+            return data["md5"]
 
         new_md5 = self._calculate_md5(file_path)
         if new_md5:
-            with self._lock:
-                self.cache[rel_path] = {"mtime": mtime, "md5": new_md5}
-                self._updated = True
+            entry = {"mtime": st.st_mtime, "size": st.st_size, "md5": new_md5}
+            self.cache[rel_path] = entry
+            self._mark(rel_path, entry)
         return new_md5
 
     def _calculate_md5(self, file_path: Path) -> Optional[str]:
         logger.debug(f"计算 MD5: {file_path.name}")
         try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096 * 1024), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            # 无缓冲打开，file_digest 直接 readinto 到自己的缓冲区，省去 BufferedReader 的一层拷贝
+            with open(file_path, "rb", buffering=0) as f:
+                fadvise = getattr(os, "posix_fadvise", None)
+                if fadvise:
+                    # 提示内核顺序读取以加大预读
+                    fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                try:
+                    # Python 3.11+ 复用同一块缓冲区读取，避免每块分配新的 bytes
+                    if hasattr(hashlib, "file_digest"):
+                        return hashlib.file_digest(f, "md5").hexdigest()
+                    # 旧版本 Python 直接映射整个文件一次性计算，省去 read 的拷贝
+                    try:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            return hashlib.md5(mm).hexdigest()
+                    except (OSError, ValueError):
+                        # 空文件无法映射，地址空间不足时也会失败，退回分块读取
+                        pass
+                    hash_md5 = hashlib.md5()
+                    buf = bytearray(4096 * 1024)
+                    view = memoryview(buf)
+                    while True:
+                        n = f.readinto(buf)
+                        if not n:
+                            break
+                        hash_md5.update(view[:n])
+                    return hash_md5.hexdigest()
+                finally:
+                    if fadvise:
+                        # 校验只读一遍，读完即丢弃页缓存，避免挤掉系统中其他有用的缓存
+                        fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
         except Exception as e:
             logger.error(f"计算 MD5 错误 {file_path}: {e}")
             return None
 
-    def clear(self, file_path: Path) -> None:
+    def _rel(self, file_path: Path) -> Optional[str]:
+        """缓存键：相对游戏根目录的 POSIX 风格路径，不在根目录下时返回 None"""
         try:
-            rel_path = str(file_path.relative_to(self.game_root)).replace("\\", "/")
-            with self._lock:
-                if rel_path in self.cache:
-                    del self.cache[rel_path]
-                    self._updated = True
+            return str(file_path.relative_to(self.game_root)).replace("\\", "/")
         except ValueError:
-            pass
+            return None
+
+    def rename(self, src: Path, dst: Path) -> None:
+        """文件改名后迁移对应的缓存条目，rename 不改变 mtime，内容未变无需重新计算 MD5"""
+        src_rel = self._rel(src)
+        entry = self.cache.pop(src_rel, None)
+        if entry is not None:
+            self._mark(src_rel, None)
+        dst_rel = self._rel(dst)
+        stale = self.cache.pop(dst_rel, None)
+        if entry is not None and dst_rel is not None:
+            self.cache[dst_rel] = entry
+            self._mark(dst_rel, entry)
+        elif stale is not None:
+            self._mark(dst_rel, None)
+
+    def put(self, file_path: Path, md5: str) -> None:
+        """记录已知内容的 MD5 (如下载时边写边算的结果)"""
+        rel_path = self._rel(file_path)
+        if rel_path is None:
+            return
+        try:
+            st = file_path.stat()
+        except OSError:
+            return
+        entry = {"mtime": st.st_mtime, "size": st.st_size, "md5": md5}
+        self.cache[rel_path] = entry
+        self._mark(rel_path, entry)
+
+    def clear(self, file_path: Path) -> None:
+        # 新下载的文件通常不在缓存中，只有真正删除了条目才标记为需要保存
+        rel_path = self._rel(file_path)
+        if self.cache.pop(rel_path, None) is not None:
+            self._mark(rel_path, None)
 
 
 # 定义彩虹颜色列表
@@ -155,8 +304,226 @@ class RainbowBarColumn(BarColumn):
         return super().render(task)
 
 
+class _CountingWriter:
+    """包装下载目标文件，只累计写入的字节数，进度条由 _ProgressPump 统一刷新"""
+
+    def __init__(self, f, hasher=None):
+        self._f = f
+        # 从头写入时顺便计算 MD5，下载完成即可写入缓存，之后校验无需再读一遍文件
+        self.hasher = hasher
+        self.written = 0
+        self.reported = 0
+
+    def write(self, data) -> int:
+        # 每个文件只由一个下载线程写入，计数无需加锁
+        n = self._f.write(data)
+        if self.hasher is not None:
+            self.hasher.update(data)
+        self.written += n
+        return n
+
+
+class _ProgressPump:
+    """后台线程定时汇总各下载线程的字节计数并刷新进度条，下载线程不再逐块竞争 Rich 的锁"""
+
+    def __init__(self, progress: Progress, overall_task_id: TaskID, interval: float = 0.1):
+        self._progress = progress
+        self._overall_task_id = overall_task_id
+        self._interval = interval
+        # 同一个进度条任务可能对应多个写入者 (大文件分段并行下载)
+        self._writers: Dict[_CountingWriter, TaskID] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "_ProgressPump":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._tick()
+
+    def register(self, task_id: TaskID, writer: _CountingWriter) -> None:
+        with self._lock:
+            self._writers[writer] = task_id
+
+    def unregister(self, writer: _CountingWriter) -> None:
+        """移除计数器前先把剩余的字节数同步到进度条"""
+        with self._lock:
+            task_id = self._writers.pop(writer, None)
+            if task_id is not None:
+                self._advance(self._report(task_id, writer))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self._tick()
+
+    def _tick(self) -> None:
+        with self._lock:
+            self._advance(sum(self._report(task_id, w) for w, task_id in self._writers.items()))
+
+    def _report(self, task_id: TaskID, writer: _CountingWriter) -> int:
+        delta = writer.written - writer.reported
+        if delta:
+            writer.reported += delta
+            self._progress.update(task_id, advance=delta)
+        return delta
+
+    def _advance(self, delta: int) -> None:
+        if delta:
+            self._progress.update(self._overall_task_id, advance=delta)
+
+
+class _RangedDownload:
+    """大文件分段并行下载的共享状态，各分段按偏移写入同一个预分配的 .part 文件"""
+
+    def __init__(self, url: str, dest: Path, size: int, segment_size: int):
+        self.url = url
+        self.dest = dest
+        self.size = size
+        self.segment_size = segment_size
+        self.segments = [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+        self.part_file = dest.with_suffix(dest.suffix + ".part")
+        # 记录远端版本和已完成的分段，中断后只需补下缺失的分段
+        self.meta_file = dest.with_suffix(dest.suffix + ".part.meta")
+        self.task_id: Optional[TaskID] = None
+        # 由第一个开始执行的分段负责初始化，ready 表示 .part 文件已可写入
+        self.started = False
+        self.ready = False
+        self.validator: Optional[str] = None
+        self.done: set = set()
+        self.remaining = len(self.segments)
+        self.failed = False
+        # 服务器不支持 Range 或远端文件已变化，分段数据不可用
+        self.unusable = False
+        self.lock = threading.Lock()
+
+    def prepare(self) -> None:
+        """恢复上次中断时的进度，已完成的分段记录在 done 中"""
+        try:
+            meta = json_loads(self.meta_file.read_bytes())
+            if meta["segment_size"] == self.segment_size and self.part_file.stat().st_size == self.size:
+                self.validator = meta["validator"]
+                self.done = set(meta["done"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        if not self.validator:
+            # 没有可用的断点记录，预分配完整大小的文件
+            self.done = set()
+            with open(self.part_file, "wb") as f:
+                f.truncate(self.size)
+
+    def done_bytes(self) -> int:
+        return sum(self.segments[i][1] - self.segments[i][0] + 1 for i in self.done)
+
+    def save_meta(self) -> None:
+        """调用方需持有 lock；没有版本标识时无法安全续传，不做记录"""
+        if self.validator:
+            meta = {"validator": self.validator, "segment_size": self.segment_size, "done": sorted(self.done)}
+            try:
+                self.meta_file.write_bytes(json_dumps(meta))
+            except OSError:
+                # 断点记录只影响续传，写入失败不应让分段本身失败
+                pass
+
+
+def _validator_of(headers) -> Optional[str]:
+    """取响应中可用于 If-Range 的版本标识，弱 ETag 不能用于 If-Range，此时退而使用 Last-Modified"""
+    etag = headers.get("ETag")
+    return etag if etag and not etag.startswith("W/") else headers.get("Last-Modified")
+
+
+def _check_length(headers, expected: int) -> None:
+    """写入本地文件前先核对 Content-Length，长度不符 (如 CDN 返回了错误页) 时直接放弃本次响应"""
+    length = headers.get("Content-Length")
+    if length is not None and int(length) != expected:
+        raise NetworkError(f"响应长度不符: {length} != {expected}")
+
+
+def _download_workers() -> int:
+    """并行下载线程数，可通过环境变量 WWM_DL_WORKERS 覆盖"""
+    try:
+        n = int(os.environ.get("WWM_DL_WORKERS", ""))
+    except ValueError:
+        n = 0
+    # 下载线程大部分时间阻塞在网络上，默认按 CPU 核数的 4 倍，最多 32 个
+    return n if n > 0 else min(32, (os.cpu_count() or 4) * 4)
+
+
+class _HttpPool:
+    """按 URL 选择连接池：与 urlopen 一样按协议取代理环境变量，并遵守 no_proxy"""
+
+    def __init__(self, maxsize: int):
+        self._kwargs = {
+            "num_pools": 4,
+            "maxsize": maxsize,
+            # 重试由调用方自行控制，这里只保留与 urlopen 一致的重定向跟随
+            "retries": urllib3.Retry(connect=0, read=0, status=0, other=0, redirect=5),
+        }
+        self._direct = urllib3.PoolManager(**self._kwargs)
+        # 只有 http/https 的代理会被用到，提前创建以便代理配置有误时在构造阶段就报错
+        self._proxied = {}
+        for scheme, proxy in getproxies().items():
+            if scheme in ("http", "https"):
+                self._proxied[scheme] = self._make_proxy_manager(proxy)
+        self._bypass: Dict[str, bool] = {}
+
+    def _make_proxy_manager(self, proxy: str) -> urllib3.PoolManager:
+        if proxy.lower().startswith("socks"):
+            # 先检查 PySocks 是否可用，缺失时 urllib3 导入 contrib.socks 会打印一条警告
+            if importlib.util.find_spec("socks") is None:
+                raise ConfigError(f"检测到 SOCKS 代理 {proxy}，需要安装 PySocks (pip install 'urllib3[socks]')")
+            from urllib3.contrib.socks import SOCKSProxyManager
+
+            return SOCKSProxyManager(proxy, **self._kwargs)
+        try:
+            return urllib3.ProxyManager(proxy, **self._kwargs)
+        except (urllib3.exceptions.ProxySchemeUnknown, ValueError) as e:
+            raise ConfigError(f"不支持的代理配置 {proxy}: {e}")
+
+    def _manager_for(self, url: str) -> urllib3.PoolManager:
+        parts = urlsplit(url)
+        manager = self._proxied.get(parts.scheme)
+        if manager is None:
+            return self._direct
+        host = parts.hostname or ""
+        bypass = self._bypass.get(host)
+        if bypass is None:
+            # proxy_bypass 在 Windows 上要读注册表，按主机缓存结果
+            bypass = self._bypass[host] = bool(proxy_bypass(host))
+        return self._direct if bypass else manager
+
+    def request(self, method: str, url: str, **kwargs) -> urllib3.BaseHTTPResponse:
+        return self._manager_for(url).request(method, url, **kwargs)
+
+
+def _quote_url(s: str) -> str:
+    """仅在包含需要转义的字符时才调用 quote"""
+    if _URL_SAFE_RE.fullmatch(s):
+        return s
+    return quote(s, safe=":/")
+
+
+def _walk_files(root: str):
+    """递归遍历目录下的文件，DirEntry 自带类型信息，无需再逐个 stat"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
 # --- 核心管理器 ---
 class WGameManager:
+    # 不小于该大小的文件拆成多个 Range 分段并行下载
+    RANGE_THRESHOLD = 64 * 1024 * 1024
+    RANGE_SEGMENT_SIZE = 16 * 1024 * 1024
+
     def __init__(self, game_folder: Path, server_type: str):
         if server_type not in SERVER_CONFIGS:
             raise ConfigError(f"无效的服务器类型: {server_type}")
@@ -165,44 +532,65 @@ class WGameManager:
         self.server_type = server_type
         self.config = SERVER_CONFIGS[server_type]
 
-        self.md5_cache = MD5Cache(self.game_folder / "wwm_md5_cache.json", self.game_folder)
+        self.md5_cache = MD5Cache(self.game_folder / "wwm_md5_cache.jsonl", self.game_folder)
+        # 并行下载的线程数，同时也是连接池中每个主机保留的连接数
+        self.download_workers = _download_workers()
+        self._http = _HttpPool(self.download_workers)
 
         self._launcher_info = None
         self._cdn_node = None
         self._game_index = None
+        # 保证远程配置只获取一次；属性之间会互相调用，需要可重入锁
+        self._meta_lock = threading.RLock()
 
     @property
     def launcher_info(self):
+        # 已获取时直接返回，不经过锁
         if not self._launcher_info:
-            logger.info(f"正在获取 {self.server_type} 服配置...")
-            self._launcher_info = self._http_get_json(self.config["api_url"])
-            if not self._launcher_info:
-                raise NetworkError("无法获取启动器配置信息")
+            with self._meta_lock:
+                if not self._launcher_info:
+                    logger.info(f"正在获取 {self.server_type} 服配置...")
+                    info = self._http_get_json(self.config.api_url)
+                    if not info:
+                        raise NetworkError("无法获取启动器配置信息")
+                    self._launcher_info = info
         return self._launcher_info
 
     @property
     def cdn_node(self):
         if not self._cdn_node:
-            nodes = self.launcher_info["default"].get("cdnList", [])
-            valid_nodes = [n for n in nodes if n.get("K1") == 1 and n.get("K2") == 1]
-            if not valid_nodes:
-                raise NetworkError("没有可用的 CDN 节点")
-            best = max(valid_nodes, key=lambda x: x["P"])
-            self._cdn_node = best["url"]
-            logger.info(f"使用 CDN: {self._cdn_node}")
+            with self._meta_lock:
+                if not self._cdn_node:
+                    nodes = self.launcher_info["default"].get("cdnList", [])
+                    valid_nodes = [n for n in nodes if n.get("K1") == 1 and n.get("K2") == 1]
+                    if not valid_nodes:
+                        raise NetworkError("没有可用的 CDN 节点")
+                    best = max(valid_nodes, key=lambda x: x["P"])
+                    self._cdn_node = best["url"]
+                    logger.info(f"使用 CDN: {self._cdn_node}")
         return self._cdn_node
 
     @property
     def game_index(self):
         if not self._game_index:
-            uri = self.launcher_info["default"]["config"]["indexFile"]
-            url = urljoin(self.cdn_node, uri)
-            logger.info("下载文件清单 (Index)...")
-            self._game_index = self._http_get_json(url)
-            if not self._game_index:
-                raise NetworkError("无法下载文件清单")
+            with self._meta_lock:
+                if not self._game_index:
+                    uri = self.launcher_info["default"]["config"]["indexFile"]
+                    url = urljoin(self.cdn_node, uri)
+                    logger.info("下载文件清单 (Index)...")
+                    index = self._http_get_json(url)
+                    if not index:
+                        raise NetworkError("无法下载文件清单")
+                    self._game_index = index
         return self._game_index
 
+    def _reset_remote_info(self) -> None:
+        """丢弃已获取的远程配置，CDN 节点由启动器配置选出，需一并重新获取"""
+        with self._meta_lock:
+            self._launcher_info = None
+            self._cdn_node = None
+            self._game_index = None
+
     # 获取预下载信息
     @property
     def predownload_index(self):
@@ -220,16 +608,36 @@ class WGameManager:
         logger.info("下载预下载文件清单...")
         return self._http_get_json(url)
 
+    @contextmanager
+    def _request(self, url: str, headers: Dict[str, str], timeout: float):
+        """发起流式 GET 请求，离开时把连接还给连接池；中途出错时响应未读完，连接不能复用，直接关闭"""
+        # 不自动解码：下载请求不声明压缩，可跳过 urllib3 的解码缓冲，每块数据少一次拷贝；
+        # 清单请求的 gzip 由调用方自行流式解压
+        rsp = self._http.request(
+            "GET", url, headers=headers, preload_content=False, decode_content=False, timeout=timeout
+        )
+        try:
+            yield rsp
+        except BaseException:
+            rsp.close()
+            raise
+        finally:
+            rsp.release_conn()
+
     def _http_get_json(self, url: str) -> Optional[Any]:
         try:
-            req = Request(url, headers={"User-Agent": "WW-Manager/2.0", "Accept-Encoding": "gzip"})
-            with urlopen(req, timeout=10) as rsp:
+            # 与文件下载共用连接池，CDN 上的清单和资源文件可复用同一批连接
+            with self._request(url, {"User-Agent": "WW-Manager/2.0", "Accept-Encoding": "gzip"}, timeout=10) as rsp:
                 if rsp.status != 200:
-                    return None
-                data = rsp.read()
+                    raise NetworkError(f"HTTP {rsp.status}")
                 if "gzip" in rsp.headers.get("Content-Encoding", "").lower():
-                    data = gzip.decompress(data)
-                return json.loads(data)
+                    # 边接收边解压，不在内存中同时保留压缩和解压两份数据；
+                    # GzipFile 每次只读 8 KiB，套一层 64 KiB 的缓冲减少对 urllib3 的调用次数
+                    # 读到末尾时 urllib3 默认会自动关闭响应，被 io 包装后需关闭该行为
+                    rsp.auto_close = False
+                    with gzip.GzipFile(fileobj=io.BufferedReader(rsp, 64 * 1024)) as gz:
+                        return json_loads(gz.read())
+                return json_loads(rsp.read())
         except Exception as e:
             logger.error(f"HTTP 请求失败 {url}: {e}")
             return None
@@ -240,70 +648,85 @@ class WGameManager:
         dest: Path,
         expected_size: int,
         progress: Optional[Progress] = None,
-        overall_task_id: Optional[TaskID] = None,
+        pump: Optional[_ProgressPump] = None,
     ) -> bool:
         """带重试的单文件下载，使用 Rich Progress"""
         dest.parent.mkdir(parents=True, exist_ok=True)
 
         task_id = None
         if progress:
-            # 注册任务
-            task_id = progress.add_task(description=dest.name, total=expected_size)
-            color = RAINBOW_COLORS[task_id % len(RAINBOW_COLORS)]
-            progress.update(task_id, description=f"[{color}]{dest.name}[/{color}]")
+            task_id = self._add_progress_task(progress, dest, expected_size)
 
         temp_file = dest.with_suffix(dest.suffix + ".temp")
-        headers = {"User-Agent": "WW-Manager/2.0"}
+        # 记录临时文件对应的远端版本 (ETag/Last-Modified)，续传时用 If-Range 校验
+        meta_file = dest.with_suffix(dest.suffix + ".temp.meta")
 
         retries = 3
         success = False
+        digest = None
 
         for attempt in range(retries):
             try:
-                resume_byte = 0
-                if temp_file.exists():
+                writer = None
+                try:
                     resume_byte = temp_file.stat().st_size
+                except FileNotFoundError:
+                    resume_byte = 0
+                if resume_byte > expected_size:
+                    # 残留的临时文件比目标还大，无法续传，只能重新下载
+                    resume_byte = 0
 
                 # 如果已完成，更新进度条并跳过
                 if resume_byte == expected_size:
                     if progress and task_id is not None:
                         progress.update(task_id, completed=expected_size)
-                        if overall_task_id is not None:
-                            # 这里不更新总进度，因为会在外部循环控制，或者 update(advance=0)
-                            pass
                     success = True
                     break
 
+                headers = {"User-Agent": "WW-Manager/2.0"}
                 if resume_byte > 0:
                     headers["Range"] = f"bytes={resume_byte}-"
+                    # 远端文件已变化时服务器会忽略 Range 返回完整内容，避免把新旧数据拼在一起
+                    validator = self._read_validator(meta_file)
+                    if validator:
+                        headers["If-Range"] = validator
                     # 更新子进度条到断点位置
                     if progress and task_id is not None:
                         progress.update(task_id, completed=resume_byte)
 
-                mode = "ab" if resume_byte > 0 else "wb"
-
-                req = Request(url, headers=headers)
-                with urlopen(req, timeout=15) as rsp:
-                    if rsp.status not in (200, 206):
+                # 通过连接池复用 TCP/TLS 连接，避免每个文件都重新握手
+                with self._request(url, headers, timeout=15) as rsp:
+                    if rsp.status == 206 and resume_byte > 0:
+                        mode = "ab"
+                        _check_length(rsp.headers, expected_size - resume_byte)
+                    elif rsp.status == 200:
+                        # 完整响应：首次下载、服务器不支持续传，或远端文件已变化，都从头写入
+                        mode = "wb"
+                        _check_length(rsp.headers, expected_size)
+                        self._write_validator(meta_file, rsp.headers)
+                        if resume_byte > 0 and progress and task_id is not None:
+                            progress.update(task_id, completed=0)
+                    else:
+                        if rsp.status == 416:
+                            # 断点位置已不合法，删除临时文件，下次重试从头下载
+                            temp_file.unlink()
                         raise NetworkError(f"HTTP {rsp.status}")
 
                     with open(temp_file, mode) as f:
-                        while True:
-                            chunk = rsp.read(1024 * 256)
-                            if not chunk:
-                                break
-                            f.write(chunk)
-
-                            # 更新界面
-                            if progress:
-                                chunk_len = len(chunk)
-                                if task_id is not None:
-                                    progress.update(task_id, advance=chunk_len)
-                                if overall_task_id is not None:
-                                    progress.update(overall_task_id, advance=chunk_len)
+                        writer = _CountingWriter(f, hashlib.md5() if mode == "wb" else None)
+                        if pump and task_id is not None:
+                            pump.register(task_id, writer)
+                        try:
+                            shutil.copyfileobj(rsp, writer, 1024 * 1024)
+                        finally:
+                            # 中途断开时也要把已写入的字节反映到进度条上
+                            if pump and task_id is not None:
+                                pump.unregister(writer)
 
                 if temp_file.stat().st_size == expected_size:
                     success = True
+                    if writer.hasher is not None:
+                        digest = writer.hasher.hexdigest()
                     break
                 else:
                     # 大小不对，重试
@@ -318,8 +741,14 @@ class WGameManager:
                 time.sleep(1 + attempt)
 
         if success:
-            shutil.move(temp_file, dest)
-            self.md5_cache.clear(dest)
+            # 临时文件与目标在同一目录，os.replace 一次 rename 即可原子覆盖，用不到 shutil.move 的跨分区复制
+            os.replace(temp_file, dest)
+            if digest:
+                self.md5_cache.put(dest, digest)
+            else:
+                self.md5_cache.clear(dest)
+            if meta_file.exists():
+                meta_file.unlink()
 
         # 移除子任务，保持界面整洁
         if progress and task_id is not None:
@@ -327,6 +756,136 @@ class WGameManager:
 
         return success
 
+    @staticmethod
+    def _add_progress_task(progress: Progress, dest: Path, size: int) -> TaskID:
+        # 注册任务
+        task_id = progress.add_task(description=dest.name, total=size)
+        color = RAINBOW_COLORS[task_id % len(RAINBOW_COLORS)]
+        progress.update(task_id, description=f"[{color}]{dest.name}[/{color}]")
+        return task_id
+
+    def _submit_ranged(self, executor: ThreadPoolExecutor, task: dict, progress: Progress, pump: _ProgressPump):
+        """把大文件拆成分段提交到下载线程池，由最后完成的分段负责收尾，提交方无需等待"""
+        rd = _RangedDownload(task["url"], task["path"], task["size"], self.RANGE_SEGMENT_SIZE)
+        return [executor.submit(self._download_segment, rd, i, progress, pump) for i in range(len(rd.segments))]
+
+    def _start_ranged(self, rd: _RangedDownload, progress: Progress) -> None:
+        """由第一个开始执行的分段调用：与单连接下载一样在工作线程中才创建进度条和预分配文件，
+        排队中的大文件不会提前占用进度条和磁盘"""
+        with rd.lock:
+            if rd.started:
+                return
+            rd.started = True
+            rd.task_id = self._add_progress_task(progress, rd.dest, rd.size)
+            try:
+                rd.dest.parent.mkdir(parents=True, exist_ok=True)
+                rd.prepare()
+            except OSError as e:
+                # 只影响这一个文件，其余分段直接跳过，由最后一个分段报告失败
+                rd.failed = True
+                progress.console.log(f"[red]下载失败 {rd.dest.name}: {e}[/red]")
+                return
+            rd.ready = True
+            progress.update(rd.task_id, completed=rd.done_bytes())
+
+    def _download_segment(self, rd: _RangedDownload, index: int, progress: Progress, pump: _ProgressPump) -> bool:
+        self._start_ranged(rd, progress)
+        start, end = rd.segments[index]
+        pos = start
+        # 上次中断前已完成的分段无需重新下载
+        ok = rd.ready and index in rd.done
+        error = None
+
+        for attempt in range(3):
+            if ok or not rd.ready or rd.unusable:
+                break
+            try:
+                headers = {"User-Agent": "WW-Manager/2.0", "Range": f"bytes={pos}-{end}"}
+                if rd.validator:
+                    # 远端文件已变化时服务器会返回 200，而不是把新旧数据拼在一起
+                    headers["If-Range"] = rd.validator
+                with self._request(rd.url, headers, timeout=15) as rsp:
+                    if rsp.status != 206:
+                        if rsp.status == 200:
+                            rd.unusable = True
+                        raise NetworkError(f"HTTP {rsp.status}")
+                    _check_length(rsp.headers, end - pos + 1)
+                    validator = _validator_of(rsp.headers)
+                    with rd.lock:
+                        if rd.validator is None:
+                            rd.validator = validator
+                        elif validator and validator != rd.validator:
+                            rd.unusable = True
+                            raise NetworkError("远端文件在下载过程中发生变化")
+
+                    with open(rd.part_file, "r+b") as f:
+                        f.seek(pos)
+                        writer = _CountingWriter(f)
+                        pump.register(rd.task_id, writer)
+                        try:
+                            shutil.copyfileobj(rsp, writer, 1024 * 1024)
+                        finally:
+                            pump.unregister(writer)
+                            # 重试时从已写入的位置继续
+                            pos += writer.written
+
+                if pos != end + 1:
+                    raise NetworkError("分段数据不完整")
+                ok = True
+                break
+            except Exception as e:
+                error = e
+                if not rd.unusable and attempt < 2:
+                    time.sleep(1 + attempt)
+
+        with rd.lock:
+            if ok:
+                if index not in rd.done:
+                    rd.done.add(index)
+                    rd.save_meta()
+            elif not rd.failed:
+                rd.failed = True
+                if not rd.unusable:
+                    progress.console.log(f"[red]下载失败 {rd.dest.name}: {error}[/red]")
+            rd.remaining -= 1
+            last = rd.remaining == 0
+        return self._finish_ranged(rd, progress, pump) if last else True
+
+    def _finish_ranged(self, rd: _RangedDownload, progress: Progress, pump: _ProgressPump) -> bool:
+        progress.remove_task(rd.task_id)
+        if not rd.failed:
+            try:
+                os.replace(rd.part_file, rd.dest)
+            except OSError as e:
+                # 与单连接下载一样只把这个文件记为失败，不中断整批下载
+                progress.console.log(f"[red]下载失败 {rd.dest.name}: {e}[/red]")
+                return False
+            self.md5_cache.clear(rd.dest)
+            rd.meta_file.unlink(missing_ok=True)
+            return True
+        if not rd.unusable:
+            # 普通网络错误，保留已完成的分段，下次 sync 时续传
+            return False
+        # 服务器不支持 Range 或远端文件已变化，丢弃分段数据，改用单连接下载
+        rd.part_file.unlink(missing_ok=True)
+        rd.meta_file.unlink(missing_ok=True)
+        return self._download_file(rd.url, rd.dest, rd.size, progress, pump)
+
+    @staticmethod
+    def _read_validator(meta_file: Path) -> Optional[str]:
+        try:
+            return meta_file.read_text(encoding="utf-8").strip() or None
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_validator(meta_file: Path, rsp_headers) -> None:
+        validator = _validator_of(rsp_headers)
+        if validator:
+            meta_file.write_text(validator, encoding="utf-8")
+        elif meta_file.exists():
+            meta_file.unlink()
+
     def _batch_download(self, tasks: List[dict]):
         if not tasks:
             logger.info("没有文件需要下载")
@@ -335,7 +894,9 @@ class WGameManager:
         total_size = sum(t["size"] for t in tasks)
         logger.info(f"准备下载 {len(tasks)} 个文件，总大小: {total_size / 1024 / 1024:.2f} MB")
 
-        max_workers = 8
+        # 大文件优先提交，避免最后只剩一个大文件单线程下载拖慢整体完成时间
+        tasks = sorted(tasks, key=lambda t: t["size"], reverse=True)
+        max_workers = self.download_workers
 
         progress = Progress(
             TextColumn("{task.description}", justify="right"),
@@ -351,16 +912,23 @@ class WGameManager:
         with progress:
             overall_task = progress.add_task("Total Download", total=total_size)
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with _ProgressPump(progress, overall_task) as pump, ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = []
                 for task in tasks:
+                    # 大文件分段并行下载；已有单连接下载的临时文件时继续原方式续传
+                    if (
+                        task["size"] >= self.RANGE_THRESHOLD
+                        and not task["path"].with_suffix(task["path"].suffix + ".temp").exists()
+                    ):
+                        futures.extend(self._submit_ranged(executor, task, progress, pump))
+                        continue
                     future = executor.submit(
                         self._download_file,
                         task["url"],
                         task["path"],
                         task["size"],
                         progress,
-                        overall_task,
+                        pump,
                     )
                     futures.append(future)
 
@@ -380,10 +948,15 @@ class WGameManager:
 
         logger.info("正在校验文件 (可能需要几分钟)...")
 
-        # 引入 rich 进度条和多线程组件
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        # 资源根地址对整批文件都相同，只需拼接和转义一次
+        base_url = _quote_url(urljoin(self.cdn_node, f"{res_base}/"))
+
+        def make_task(item, dest_path):
+            return {"url": base_url + _quote_url(item["dest"]), "path": dest_path, "size": int(item["size"])}
 
-        from rich.progress import BarColumn, Progress, TextColumn, TimeRemainingColumn
+        def check_md5(item, dest_path, st):
+            # md5_cache 的读写都是单次 dict 操作，可安全并发调用
+            return item, dest_path, self.md5_cache.get_by_rel(item["dest"], dest_path, st) == item["md5"]
 
         with Progress(
             TextColumn("[progress.description]{task.description}", justify="left"),
@@ -396,47 +969,63 @@ class WGameManager:
             # 添加总校验任务
             verify_task = progress.add_task("[cyan]准备校验...", total=len(res_list))
 
-            # 定义供多线程调用的单个文件校验函数
-            def check_file(item):
-                dest_path = self.game_folder / item["dest"]
-                expected_md5 = item["md5"]
-                expected_size = int(item["size"])
-
-                need_download = False
-                if not dest_path.exists():
-                    need_download = True
+            # 先用 stat 做存在性和大小检查，大小不符的文件无需计算 MD5 即可判定需要下载
+            # 循环内直接用字符串路径 stat，只在需要时才构造 Path 对象
+            # 清单可能有十万条以上，循环中用到的属性和函数先绑定到局部变量
+            to_hash = []
+            root_str = str(self.game_folder) + os.sep
+            native_sep = os.sep != "/"
+            stat = os.stat
+            add_task = tasks.append
+            add_hash = to_hash.append
+            advance = progress.advance
+            # 进度条每处理一批再推进一次，避免逐条获取 Rich 的锁
+            checked = 0
+            for item in res_list:
+                dest = item["dest"]
+                dest_str = root_str + (dest.replace("/", os.sep) if native_sep else dest)
+                try:
+                    st = stat(dest_str)
+                except OSError:
+                    st = None
+                if st is None or st.st_size != int(item["size"]):
+                    add_task(make_task(item, Path(dest_str)))
                 elif force_check_md5:
-                    # md5_cache 内部已实现线程安全锁，可安全并发调用
-                    if self.md5_cache.get(dest_path) != expected_md5:
-                        need_download = True
-                elif dest_path.stat().st_size != expected_size:
-                    need_download = True
-
-                download_info = None
-                if need_download:
-                    url = urljoin(self.cdn_node, f"{res_base}/{item['dest']}")
-                    download_info = {
-                        "url": quote(url, safe=":/"),
-                        "path": dest_path,
-                        "size": expected_size,
-                    }
-                return download_info, dest_path.name
-
-            # 开启多线程池并发校验（最大线程数设为 8，兼顾 SSD IO 性能和 CPU 负载）
-            max_workers = 8
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有任务
-                futures = {executor.submit(check_file, item): item for item in res_list}
-
-                # 收集结果并更新进度条
-                for future in as_completed(futures):
-                    download_info, file_name = future.result()
-                    if download_info:
-                        tasks.append(download_info)
-
-                    # 在主线程中更新进度条，避免多线程直接操作 UI 导致闪烁
-                    progress.update(verify_task, description=f"[cyan]校验中: {file_name}[/cyan]")
-                    progress.advance(verify_task)
+                    # 复用这里的 stat 结果，MD5 缓存校验时无需再 stat 一次
+                    add_hash((item, Path(dest_str), st))
+                    continue
+                checked += 1
+                if checked == 1024:
+                    advance(verify_task, checked)
+                    checked = 0
+            advance(verify_task, checked)
+
+            # hashlib 计算大块数据时会释放 GIL，线程数按 CPU 核数即可跑满
+            if to_hash:
+                with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as executor:
+                    futures = [executor.submit(check_md5, *args) for args in to_hash]
+
+                    # 在主线程中更新进度条，避免多线程直接操作 UI 导致闪烁；
+                    # 缓存命中时每秒可完成上万个文件，进度最多每 100ms 刷新一次
+                    pending = 0
+                    last_refresh = 0.0
+                    for future in as_completed(futures):
+                        item, dest_path, md5_ok = future.result()
+                        if not md5_ok:
+                            tasks.append(make_task(item, dest_path))
+                        pending += 1
+                        now = time.monotonic()
+                        if now - last_refresh >= 0.1:
+                            progress.update(
+                                verify_task, description=f"[cyan]校验中: {dest_path.name}[/cyan]", advance=pending
+                            )
+                            pending = 0
+                            last_refresh = now
+                        self.md5_cache.checkpoint()
+                    progress.advance(verify_task, pending)
+
+        # 校验过程中新算出的 MD5 也要落盘，避免下次重复计算
+        self.md5_cache.save()
 
         if tasks:
             self._batch_download(tasks)
@@ -479,28 +1068,26 @@ class WGameManager:
         # 保存版本和服务器信息，供之后 apply_predownload 校验使用
         target_version = pre_info.get("version", "unknown")
         version_info = {"version": target_version, "server": self.server_type}
-        with open(predownload_root / "predownload_version.json", "w", encoding="utf-8") as f:
-            json.dump(version_info, f, indent=4)
+        (predownload_root / "predownload_version.json").write_bytes(json_dumps(version_info))
 
         tasks = []
         logger.info(f"开始准备预下载资源 (目标版本: {target_version})...")
+        base_url = _quote_url(urljoin(self.cdn_node, f"{res_base}/"))
 
         for item in res_list:
             dest_path = predownload_root / item["dest"]
             expected_size = int(item["size"])
 
-            # 判断是否需要下载
-            need_download = False
-            if not dest_path.exists():
-                need_download = True
-            elif dest_path.stat().st_size != expected_size:
+            # 判断是否需要下载，一次 stat 同时完成存在性和大小检查
+            try:
+                need_download = dest_path.stat().st_size != expected_size
+            except OSError:
                 need_download = True
 
             if need_download:
-                url = urljoin(self.cdn_node, f"{res_base}/{item['dest']}")
                 tasks.append(
                     {
-                        "url": quote(url, safe=":/"),
+                        "url": base_url + _quote_url(item["dest"]),
                         "path": dest_path,
                         "size": expected_size,
                     }
@@ -508,6 +1095,7 @@ class WGameManager:
 
         if tasks:
             self._batch_download(tasks)
+            self.md5_cache.save()
             logger.info("预下载资源下载完成！之后可使用 'ww predownload --apply' 命令应用更新。")
         else:
             logger.info("所有预下载资源均已存在且校验通过，无需重复下载。")
@@ -522,10 +1110,9 @@ class WGameManager:
 
         # 读取版本信息
         try:
-            with open(version_file, "r") as f:
-                info = json.load(f)
-                target_version = info["version"]
-                predownload_server = info["server"]
+            info = json_loads(version_file.read_bytes())
+            target_version = info["version"]
+            predownload_server = info["server"]
         except Exception:
             raise ConfigError("预下载版本信息损坏。")
 
@@ -538,19 +1125,27 @@ class WGameManager:
         # 1. 移动文件
         # 遍历 .predownload 下的所有文件并移动到 game_folder
         count = 0
-        for file_path in predownload_root.rglob("*"):
-            if file_path.is_file() and file_path.name != "predownload_version.json":
+        root_str = str(predownload_root)
+        for entry in _walk_files(root_str):
+            # 预下载中断时留下的临时文件 (.temp/.part 及其 .meta) 不能合并进游戏目录，
+            # 随预下载目录一起删除，缺失的文件由之后的同步补齐
+            if entry.name != "predownload_version.json" and not entry.name.endswith(_PARTIAL_SUFFIXES):
                 # 计算相对路径
-                rel_path = file_path.relative_to(predownload_root)
+                rel_path = entry.path[len(root_str) + 1 :]
                 dest_path = self.game_folder / rel_path
 
                 # 确保目标文件夹存在
                 dest_path.parent.mkdir(parents=True, exist_ok=True)
 
-                # 移动文件 (如果存在则覆盖)
-                shutil.move(str(file_path), str(dest_path))
-                # 清除旧文件的 MD5 缓存
-                self.md5_cache.clear(dest_path)
+                # 移动文件 (如果存在则覆盖)，同一分区下只需一次 rename
+                try:
+                    os.replace(entry.path, dest_path)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    shutil.move(entry.path, str(dest_path))
+                # 预下载时记录的 MD5 随文件迁移，没有记录时清除旧文件的缓存
+                self.md5_cache.rename(Path(entry.path), dest_path)
                 count += 1
 
         logger.info(f"已合并 {count} 个文件。")
@@ -571,37 +1166,40 @@ class WGameManager:
         logger.info("预下载资源已合并。正在进行最终完整性校验...")
 
         # 4. 强制执行一次 Sync 以确保万无一失
-        self._launcher_info = None
-        self._game_index = None
+        self._reset_remote_info()
         self.sync_files(force_check_md5=False)
 
         logger.info(f"更新完成！当前版本: {target_version}")
 
     def checkout(self, target_server: str, force_sync: bool = False):
-        # 1. 禁用当前差异文件
-        for _, files in SERVER_DIFF_FILES.items():
-            for f_rel in files:
-                f = self.game_folder / f_rel
-                bak = f.with_suffix(f.suffix + ".bak")
-                if f.exists():
-                    # Windows 兼容性
-                    os.replace(f, bak)
-                    self.md5_cache.clear(f)
+        # 1. 禁用当前差异文件 (cn 与 global 共用同一组文件，取并集避免重复处理)
+        for f_rel in frozenset().union(*SERVER_DIFF_FILES.values()):
+            f = self.game_folder / f_rel
+            bak = f.with_suffix(f.suffix + ".bak")
+            try:
+                # Windows 上 os.rename 遇到已存在的目标会报错，os.replace 可直接覆盖；
+                # 直接尝试并处理不存在的情况，省去一次 exists 的 stat
+                os.replace(f, bak)
+            except FileNotFoundError:
+                continue
+            self.md5_cache.rename(f, bak)
 
         # 2. 启用目标差异文件
         missing = False
-        for f_rel in SERVER_DIFF_FILES.get(target_server, []):
+        for f_rel in SERVER_DIFF_FILES.get(target_server, frozenset()):
             f = self.game_folder / f_rel
             bak = f.with_suffix(f.suffix + ".bak")
-
-            if bak.exists():
-                # Windows 兼容
+            try:
+                # 同上，os.replace 在各平台都能覆盖已存在的目标
                 os.replace(bak, f)
-                self.md5_cache.clear(f)
-            elif f.exists():
-                pass
-            else:
-                missing = True
+            except FileNotFoundError:
+                if not f.exists():
+                    missing = True
+                continue
+            self.md5_cache.rename(bak, f)
+
+        # 迁移后的缓存条目落盘，之后的校验可直接命中
+        self.md5_cache.save()
 
         # 3. 更新配置
         self.server_type = target_server
@@ -618,7 +1216,7 @@ class WGameManager:
         # 优先使用 launcher_info 中的版本，如果获取不到则保持原状或报错
         if self._launcher_info:
             v = self.launcher_info["default"]["version"]
-            cfg = {"version": v, "appId": self.config["appId"], "group": "default"}
+            cfg = {"version": v, "appId": self.config.app_id, "group": "default"}
             self.game_folder.mkdir(parents=True, exist_ok=True)
             with open(self.game_folder / "launcherDownloadConfig.json", "w") as f:
                 json.dump(cfg, f, indent=4)